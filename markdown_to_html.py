@@ -3,211 +3,371 @@
 
 Design notes:
 - Produces HTML fragments only (no <html>/<head>/<body> wrapper).
-- Lightweight,                     out.append("</tbody>")
-                    out.append("</table>")
-                    continue  # Skip para accumulation; table already handled
-
-        # Fallback: lines with '|' that aren't tables, or any other linesdency-free: uses regular expressions and line-based parsing.
+- Lightweight, dependency-free: uses regular expressions and line-based parsing
+  (no C extensions or JIT libraries, so it runs anywhere Python does).
+- Works on str end to end. Files are read and written in text mode: the
+  UTF-8 codec already fast-paths ASCII and ASCII text is stored one byte
+  per character, so decoding/encoding is a negligible share of run time.
 - Supports headings, paragraphs, bold/italic/link inline formatting,
   unordered/ordered lists, fenced code blocks (```), horizontal rules,
   and a basic GitHub-style table detection.
 
 Usage: python3 markdown_to_html.py input.txt output.txt
 """
+from __future__ import annotations
+
+import collections
+import functools
+import io
 import re
 import sys
+from typing import Callable, Iterable
 
 # Regular expressions for simple inline markdown features.
 # These are intentionally simple and cover common cases (not full CommonMark).
 # Note: Use negated character classes instead of .+? to avoid backtracking hangs.
+# Bold runs as its own pass over the whole text first, so '**' always takes
+# precedence over a stray single '*' earlier in the line. Italic and links
+# then share one alternation, so the remaining work is a single scan.
 BOLD_RE = re.compile(r"\*\*([^\*]+)\*\*")
-ITALIC_RE = re.compile(r"\*([^\*]+)\*")
-LINK_RE = re.compile(r"\[([^\]]*)\]\(([^\)]*)\)")
+EM_LINK_RE = re.compile(
+    r"\*(?P<italic>[^\*]+)\*"
+    r"|\[(?P<text>[^\]]*)\]\((?P<href>[^\)]*)\)"
+)
+
+# Table patterns, compiled once at import time rather than looked up in re's
+# internal cache on every line. Headings, rules and lists are plain prefix
+# checks and are detected with str methods below instead.
+SEP_RE = re.compile(r"^\s*[:\-\| \t]+$")
+DASH_RE = re.compile(r"-{3,}")
+
+
+def _inline_sub(m: re.Match[str]) -> str:
+    """Render one EM_LINK_RE match (italic or link) as HTML.
+
+    The inner text gets the same italic/link pass so that links inside
+    italic text and italics inside link text still render.
+    """
+    if m.lastgroup == 'italic':
+        return "<em>" + EM_LINK_RE.sub(_inline_sub, m.group('italic')) + "</em>"
+    return '<a href="' + m.group('href') + '">' + EM_LINK_RE.sub(_inline_sub, m.group('text')) + "</a>"
+
+
+# Only short texts (table cells, list items, headings) are memoized: those
+# repeat often, and capping the key length keeps the cache's memory bounded
+# no matter how long the paragraphs in a document are.
+INLINE_CACHE_MAX_LEN = 256
+
+
+def _render_inline(text: str) -> str:
+    """Apply bold, then italic and links, to text (no caching or guards)."""
+    text = BOLD_RE.sub(r"<strong>\1</strong>", text)
+    return EM_LINK_RE.sub(_inline_sub, text)
+
+
+@functools.lru_cache(maxsize=4096)
+def _render_inline_cached(text: str) -> str:
+    """Memoized _render_inline for short, frequently repeated texts."""
+    return _render_inline(text)
 
 
-def inline_replace(text):
+def inline_replace(text: str) -> str:
     """Replace inline markdown (bold, italic, links) in a text line.
 
-    Note: order matters (bold before italic) to avoid clobbering markers.
+    Bold is replaced first (BOLD_RE), then italic and links in one
+    EM_LINK_RE pass (see _inline_sub). Results for texts up to
+    INLINE_CACHE_MAX_LEN characters are memoized.
     This function does not escape HTML — assume trusted/simple inputs.
-    Uses simple string-based replacements to avoid regex backtracking hangs.
     Skips processing if text is extremely long (> 10KB) to avoid hangs.
     """
     # Safety: skip processing very long lines (potential pathological inputs)
     if len(text) > 10000:
         return text
-    
-    # Bold first (strong): **text** -> <strong>text</strong>
-    text = BOLD_RE.sub(r"<strong>\1</strong>", text)
-    # Then italic (em): *text* -> <em>text</em>
-    # Only replace if not surrounded by more asterisks to avoid double-matching
-    text = ITALIC_RE.sub(r"<em>\1</em>", text)
-    # Then links [text](url) -> <a href="url">text</a>
-    text = LINK_RE.sub(r"<a href=\"\2\">\1</a>", text)
-    return text
+    # Fast path: most lines carry no inline markup at all
+    if '*' not in text and '[' not in text:
+        return text
+    if len(text) <= INLINE_CACHE_MAX_LEN:
+        return _render_inline_cached(text)
+    return _render_inline(text)
+
 
+# Block kinds returned by _classify
+PARAGRAPH, HEADING, HR, UL, OL, TABLE = range(6)
 
-def convert(lines):
-    """Convert a list of input lines (strings) from markdown to HTML fragment.
+# Precomputed tags, indexed by heading level / keyed by list type. Closing
+# tags carry the '\n' that terminates each emitted fragment.
+H_OPEN = ('', '<h1>', '<h2>', '<h3>', '<h4>', '<h5>', '<h6>')
+H_CLOSE = ('', '</h1>\n', '</h2>\n', '</h3>\n', '</h4>\n', '</h5>\n', '</h6>\n')
+LIST_OPEN = {'ul': '<ul>\n', 'ol': '<ol>\n'}
+LIST_CLOSE = {'ul': '</ul>\n', 'ol': '</ol>\n'}
+
+
+def _classify(line: str, stripped: str) -> tuple[int, int, str]:
+    """Classify a non-blank line; return a (kind, level, text) tuple.
+
+    stripped is line.strip(), which the caller has already computed.
+
+    kind is one of the block constants above. level is the heading level
+    (0 for every other kind). text is the payload with block markers and
+    surrounding whitespace removed; for TABLE (a line containing '|' that
+    may start a table) and PARAGRAPH it is simply the stripped line.
+    """
+    # Heading: 1-6 '#', at least one whitespace, then at least one more char
+    if line[:1] == '#':
+        level = 1
+        while level < 7 and line[level:level + 1] == '#':
+            level += 1
+        rest = line[level:]
+        if level <= 6 and len(rest) >= 2 and rest[0].isspace():
+            return HEADING, level, rest.strip()
+
+    # Horizontal rule: three or more of the same '-', '*' or '_' character
+    if (len(stripped) >= 3 and stripped[0] in '-*_'
+            and stripped == stripped[0] * len(stripped)):
+        return HR, 0, ''
+
+    # List items: '-'/'*' or digits + '.', followed by whitespace
+    s = line.lstrip()
+    if s[:1] in ('-', '*') and s[1:2].isspace():
+        return UL, 0, s[1:].strip()
+    head, dot, rest = s.partition('.')
+    if dot and head.isdecimal() and rest[:1].isspace():
+        return OL, 0, rest.strip()
+
+    if '|' in line:
+        return TABLE, 0, stripped
+    return PARAGRAPH, 0, stripped
+
+
+def _split_cells(row: str) -> list[str]:
+    """Split a stripped table row ('| a | b |') into stripped cell texts.
+
+    Leading/trailing pipes are optional. An escaped pipe ('\\|') is kept in
+    the cell as a literal '|'; any other backslash is left untouched for the
+    inline pass.
+    """
+    # Fast path: without backslashes a plain C-level str.split is exact
+    if '\\' not in row:
+        return [c.strip() for c in row.strip('|').split('|')]
+
+    cells: list[str] = []
+    buf: list[str] = []
+    escaped = False
+    trailing = 0  # unescaped pipes seen since the last cell character
+    for ch in row.lstrip('|'):
+        if escaped:
+            buf.append(ch if ch == '|' else '\\' + ch)
+            escaped = False
+            trailing = 0
+        elif ch == '\\':
+            escaped = True
+            trailing = 0
+        elif ch == '|':
+            cells.append(''.join(buf).strip())
+            buf = []
+            trailing += 1
+        else:
+            buf.append(ch)
+            trailing = 0
+    if escaped:
+        buf.append('\\')
+    cells.append(''.join(buf).strip())
+    # Pipes closing the row only delimit it; drop the empty cells they made
+    if trailing:
+        del cells[-trailing:]
+    return cells
+
+
+def convert(lines: Iterable[str]) -> str:
+    """Convert an iterable of input lines (strings) to an HTML fragment string.
+
+    Thin wrapper around convert_to() that collects the output in memory.
+    """
+    buf = io.StringIO()
+    convert_to(buf.write, lines)
+    return buf.getvalue().rstrip('\n')
+
+
+def convert_to(write: Callable[[str], object], lines: Iterable[str]) -> None:
+    """Convert markdown lines to HTML, passing each fragment to write().
+
+    Every fragment (one element or code line) is written as soon as it is
+    complete, terminated by '\n', so e.g. a file's write method streams the
+    output without the whole document being held in memory.
 
     High-level approach:
-    - Iterate lines with an index so we can peek ahead for tables.
+    - Read lines one at a time, so a list or an open file both work; lines
+      peeked at while looking for a table separator go to a pushback queue.
     - Maintain small parser state: in_code, current list type, paragraph buffer.
     - Emit tags for headings, lists, tables, and code blocks as encountered.
     """
-    out = []
     in_code = False
-    code_buffer = []
-    list_type = None  # 'ul' or 'ol'
-    para_buffer = []
-
-    def flush_para():
-        """Flush an accumulated paragraph buffer into a single <p> element.
-
-        Paragraph lines are joined with spaces (preserve words across wrapped
-        lines in the source). After flushing, the buffer is cleared.
-        """
-        nonlocal para_buffer
-        if para_buffer:
-            out.append("<p>" + inline_replace(" ".join(para_buffer).strip()) + "</p>")
-            para_buffer = []
-
-    def close_list():
-        """Close any open list (</ul> or </ol>) and reset state."""
-        nonlocal list_type
-        if list_type:
-            out.append(f"</{list_type}>")
-            list_type = None
-
-    i = 0
-    n = len(lines)
-    while i < n:
-        raw = lines[i]
+    code_buffer: list[str] = []
+    list_type: str | None = None  # 'ul' or 'ol'
+    para_buffer: list[str] = []
+
+    # Closing the open paragraph/list is written out inline at each block
+    # boundary (rather than via nested helpers) to keep para_buffer and
+    # list_type plain locals on this per-line hot path:
+    # - a paragraph is its buffered lines joined with spaces, in one <p>
+    #   (each line was stripped when buffered, so the join needs no strip);
+    # - an open list is closed with </ul> or </ol>.
+    src = iter(lines)
+    # Lines read ahead but not consumed yet; replayed before reading src again
+    pending: collections.deque[str] = collections.deque()
+    raw: str | None
+    while True:
+        if pending:
+            raw = pending.popleft()
+        else:
+            raw = next(src, None)
+            if raw is None:
+                break
         line = raw.rstrip('\n')
-        if line.strip().startswith("```"):
+        stripped = line.strip()  # computed once, reused by every check below
+        if stripped.startswith("```"):
             if not in_code:
                 # Starting a code block: close running paragraphs/lists first
-                flush_para()
-                close_list()
+                if para_buffer:
+                    write("<p>" + inline_replace(" ".join(para_buffer)) + "</p>\n")
+                    para_buffer = []
+                if list_type:
+                    write(LIST_CLOSE[list_type])
+                    list_type = None
                 in_code = True
                 code_buffer = []
             else:
                 # Ending a code block: emit the collected lines unchanged
-                out.append("<pre><code>")
-                out.extend([c for c in code_buffer])
-                out.append("</code></pre>")
+                write("<pre><code>\n")
+                for c in code_buffer:
+                    write(c)
+                    write("\n")
+                write("</code></pre>\n")
                 in_code = False
                 code_buffer = []
-            i += 1
             continue
 
         # Inside a fenced code block: collect raw lines until closing ```
         # Note: blank lines inside code blocks are preserved as-is
         if in_code:
             code_buffer.append(line)
-            i += 1
             continue
 
         # Blank line => end current paragraph or list (but only outside code blocks)
-        if not line.strip():
-            flush_para()
-            close_list()
-            i += 1
+        if not stripped:
+            if para_buffer:
+                write("<p>" + inline_replace(" ".join(para_buffer)) + "</p>\n")
+                para_buffer = []
+            if list_type:
+                write(LIST_CLOSE[list_type])
+                list_type = None
             continue
 
+        kind, level, text = _classify(line, stripped)
+
         # Headings: lines starting with 1-6 '#' characters
-        m = re.match(r"^(#{1,6})\s+(.+)$", line)
-        if m:
-            flush_para()
-            close_list()
-            level = len(m.group(1))
-            out.append(f"<h{level}>" + inline_replace(m.group(2).strip()) + f"</h{level}>")
-            i += 1
+        if kind == HEADING:
+            if para_buffer:
+                write("<p>" + inline_replace(" ".join(para_buffer)) + "</p>\n")
+                para_buffer = []
+            if list_type:
+                write(LIST_CLOSE[list_type])
+                list_type = None
+            write(H_OPEN[level] + inline_replace(text) + H_CLOSE[level])
             continue
 
         # Horizontal rule (e.g. '---' or '***') on a line by itself
-        if re.match(r"^(-{3,}|\*{3,}|_{3,})$", line.strip()):
-            flush_para()
-            close_list()
-            out.append("<hr />")
-            i += 1
-            continue
-
-        # Unordered list item (lines starting with '-' or '*')
-        m = re.match(r"^\s*[-\*]\s+(.*)$", line)
-        if m:
-            flush_para()
-            if list_type != 'ul':
-                close_list()
-                out.append("<ul>")
-                list_type = 'ul'
-            out.append("<li>" + inline_replace(m.group(1).strip()) + "</li>")
-            i += 1
+        if kind == HR:
+            if para_buffer:
+                write("<p>" + inline_replace(" ".join(para_buffer)) + "</p>\n")
+                para_buffer = []
+            if list_type:
+                write(LIST_CLOSE[list_type])
+                list_type = None
+            write("<hr />\n")
             continue
 
-        # Ordered list item (e.g. '1. item')
-        m = re.match(r"^\s*\d+\.\s+(.*)$", line)
-        if m:
-            flush_para()
-            if list_type != 'ol':
-                close_list()
-                out.append("<ol>")
-                list_type = 'ol'
-            out.append("<li>" + inline_replace(m.group(1).strip()) + "</li>")
-            i += 1
+        # List items: '- item' / '* item' (ul) or '1. item' (ol)
+        if kind == UL or kind == OL:
+            tag = 'ul' if kind == UL else 'ol'
+            if para_buffer:
+                write("<p>" + inline_replace(" ".join(para_buffer)) + "</p>\n")
+                para_buffer = []
+            if list_type != tag:
+                if list_type:
+                    write(LIST_CLOSE[list_type])
+                write(LIST_OPEN[tag])
+                list_type = tag
+            write("<li>" + inline_replace(text) + "</li>\n")
             continue
 
         # Basic table detection: a line containing '|' followed by a separator
         # line such as '| --- | --- |'. This implements a simple GitHub-style
         # table parser: header row -> separator row -> body rows.
-        if '|' in line:
+        if kind == TABLE:
             # Peek next non-empty line to see if it looks like a table separator
-            j = i + 1
-            while j < n and not lines[j].strip():
-                j += 1
-            if j < n:
-                sep = lines[j].strip()
+            skipped: list[str] = []
+            nxt = pending.popleft() if pending else next(src, None)
+            while nxt is not None:
+                sep = nxt.strip()
+                if sep:
+                    break
+                skipped.append(nxt)
+                nxt = pending.popleft() if pending else next(src, None)
+            if nxt is not None:
                 # separator should contain only pipes, colons, dashes, and spaces
-                if re.match(r"^\s*[:\-\| \t]+$", sep) and re.search(r"-{3,}", sep):
+                if SEP_RE.match(sep) and DASH_RE.search(sep):
                     # It's a table: emit <table>, <thead>, and <tbody>
-                    flush_para()
-                    close_list()
-                    header_line = line.strip().strip('|')
-                    headers = [h.strip() for h in re.split(r"\s*\|\s*", header_line)]
-                    out.append("<table>")
-                    out.append("<thead>")
-                    out.append("<tr>" + ''.join([f"<th>{inline_replace(h)}</th>" for h in headers]) + "</tr>")
-                    out.append("</thead>")
-                    out.append("<tbody>")
-                    i = j + 1
-                    # consume rows until a blank line or a line without '|' character
-                    while i < n and lines[i].strip():
-                        row = lines[i].strip()
-                        if '|' not in row:
+                    if para_buffer:
+                        write("<p>" + inline_replace(" ".join(para_buffer)) + "</p>\n")
+                        para_buffer = []
+                    if list_type:
+                        write(LIST_CLOSE[list_type])
+                        list_type = None
+                    headers = _split_cells(text)
+                    write("<table>\n")
+                    write("<thead>\n")
+                    write("<tr><th>" + "</th><th>".join([inline_replace(h) for h in headers]) + "</th></tr>\n")
+                    write("</thead>\n")
+                    write("<tbody>\n")
+                    # consume rows until a blank line or a line without '|'
+                    # character; that line is pushed back for the main loop
+                    while True:
+                        raw = pending.popleft() if pending else next(src, None)
+                        if raw is None:
                             break
-                        row_cells = [c.strip() for c in re.split(r"\s*\|\s*", row.strip().strip('|'))]
-                        out.append("<tr>" + ''.join([f"<td>{inline_replace(c)}</td>" for c in row_cells]) + "</tr>")
-                        i += 1
-                    out.append("</tbody>")
-                    out.append("</table>")
+                        row = raw.strip()
+                        if not row or '|' not in row:
+                            pending.appendleft(raw)
+                            break
+                        row_cells = _split_cells(row)
+                        write("<tr><td>" + "</td><td>".join([inline_replace(c) for c in row_cells]) + "</td></tr>\n")
+                    write("</tbody>\n")
+                    write("</table>\n")
                     continue
+                skipped.append(nxt)
+            # Not a table: replay the peeked lines in their original order
+            pending.extendleft(reversed(skipped))
 
         # Fallback: accumulate paragraph lines until a blank line
-        para_buffer.append(line.strip())
-        i += 1
+        para_buffer.append(text)
 
     # end while
-    flush_para()
-    close_list()
+    if para_buffer:
+        write("<p>" + inline_replace(" ".join(para_buffer)) + "</p>\n")
+        para_buffer = []
+    if list_type:
+        write(LIST_CLOSE[list_type])
+        list_type = None
 
     # If file ended while still in code block, close it safely so output is
     # well-formed. This mirrors the behavior of closing a fenced block above.
     if in_code:
-        out.append("<pre><code>")
-        out.extend([c for c in code_buffer])
-        out.append("</code></pre>")
-
-    return "\n".join(out)
+        write("<pre><code>\n")
+        for c in code_buffer:
+            write(c)
+            write("\n")
+        write("</code></pre>\n")
 
 
 if __name__ == '__main__':
@@ -215,9 +375,8 @@ if __name__ == '__main__':
         print("Usage: markdown_to_html.py input.txt output.txt")
         sys.exit(2)
     inp, outp = sys.argv[1], sys.argv[2]
-    with open(inp, 'r', encoding='utf-8') as f:
-        src = f.readlines()
-    html = convert(src)
-    with open(outp, 'w', encoding='utf-8') as f:
-        f.write(html)
+    # Stream: read the input file line by line and write each HTML fragment
+    # straight to the (buffered) output file.
+    with open(inp, 'r', encoding='utf-8') as f, open(outp, 'w', encoding='utf-8') as out:
+        convert_to(out.write, f)
     print(f"Wrote {outp}")
@@ -1,4 +1,5 @@
-from markdown_to_html import convert
+import markdown_to_html
+from markdown_to_html import convert, convert_to
 
 
 def test_simple():
@@ -17,6 +18,15 @@ def test_simple():
     assert "<ul>" in out and "</ul>" in out
 
 
+def test_block_classification_edge_cases():
+    assert convert(["####### x"]) == "<p>####### x</p>"
+    assert convert(["#\tx"]) == "<h1>x</h1>"
+    assert convert(["1.5 items"]) == "<p>1.5 items</p>"
+    assert convert(["2. x"]) == "<ol>\n<li>x</li>\n</ol>"
+    assert convert(["* * *"]) == "<ul>\n<li><em> </em></li>\n</ul>"
+    assert convert(["***"]) == "<hr />"
+
+
 def test_table():
     md = [
         "| Name | Age |",
@@ -27,3 +37,80 @@ def test_table():
     out = convert(md)
     assert "<table>" in out
     assert "<th>Name</th>" in out and "<td>Alice</td>" in out
+
+
+def test_inline_link_and_nesting():
+    out = convert(["See **[docs](http://x.io)** and [*here*](y)."])
+    assert out == (
+        '<p>See <strong><a href="http://x.io">docs</a></strong>'
+        ' and <a href="y"><em>here</em></a>.</p>'
+    )
+
+
+def test_inline_bold_takes_precedence_over_stray_star():
+    assert convert(["a * b = **c**"]) == "<p>a * b = <strong>c</strong></p>"
+    assert convert(["Footnote* applies; see **terms** below."]) == (
+        "<p>Footnote* applies; see <strong>terms</strong> below.</p>"
+    )
+    assert convert(["***x***"]) == "<p><em><strong>x</strong></em></p>"
+
+
+def test_iterable_input_table_lookahead():
+    md = [
+        "a | b",
+        "",
+        "c",
+        "| x | y |",
+        "|---|---|",
+        "| 1 | 2 |",
+        "tail",
+    ]
+    out = convert(iter(md))
+    assert out == convert(md)
+    assert out == "\n".join([
+        "<p>a | b</p>",
+        "<p>c</p>",
+        "<table>",
+        "<thead>",
+        "<tr><th>x</th><th>y</th></tr>",
+        "</thead>",
+        "<tbody>",
+        "<tr><td>1</td><td>2</td></tr>",
+        "</tbody>",
+        "</table>",
+        "<p>tail</p>",
+    ])
+
+
+def test_convert_to_streams_fragments():
+    md = ["# T", "", "text", "```", "x = 1"]
+    chunks = []
+    convert_to(chunks.append, md)
+    assert chunks[:2] == ["<h1>T</h1>\n", "<p>text</p>\n"]
+    assert "".join(chunks) == convert(md) + "\n"
+
+
+def test_table_escaped_pipe():
+    md = [
+        "| Expr | Meaning |",
+        "| --- | --- |",
+        "| a \\| b | either |",
+    ]
+    out = convert(md)
+    assert "<tr><td>a | b</td><td>either</td></tr>" in out
+
+
+def test_repeated_cells_render_same_from_cache():
+    md = [
+        "| Name | Done |",
+        "| --- | --- |",
+        "| a | **Yes** |",
+        "| b | **Yes** |",
+    ]
+    cached = markdown_to_html._render_inline_cached
+    cached.cache_clear()
+    out = convert(md)
+    assert cached.cache_info().hits == 1
+    assert "<tr><td>a</td><td><strong>Yes</strong></td></tr>" in out
+    assert "<tr><td>b</td><td><strong>Yes</strong></td></tr>" in out
+    assert convert(md) == out